@@ -0,0 +1,124 @@
+"""
+Benchmark du temps d'import (python -X importtime) des processus dashboard et ingestion
+
+Chaque cible est importée dans un interpréteur neuf ; on additionne les
+temps cumulés des imports de premier niveau, hors modules chargés au
+démarrage de l'interpréteur. Les résultats sont comparés à la référence
+benchmarks/importtime_baseline.json (--update pour la réécrire).
+
+Usage :
+    python -m benchmarks.bench_imports [--update] [--runs 5] [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'importtime_baseline.json')
+
+# Code exécuté par chaque cible (depuis la racine du dépôt)
+TARGETS = {
+    # Niveau module de app.py : ce que paie Streamlit avant le premier affichage
+    'dashboard': "import runpy; runpy.run_path('dashboard/app.py')",
+    # Chargement des données (pandas), différé après l'en-tête
+    'dashboard_loaders': "import sys; sys.path.insert(0, 'dashboard'); import loaders",
+    # Processus principal d'ingestion avant le premier fetch
+    'ingestion': "import data_ingestion.fetch_velib",
+}
+
+
+def _importtime(code):
+    """Retourne {module: (profondeur, temps cumulé en µs)} pour `code`"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (depth, int(cumulative))
+    return modules
+
+
+def measure(code, startup_modules):
+    """Temps total (ms) et modules les plus coûteux pour une exécution
+
+    Le total additionne les imports de premier niveau (les imports imbriqués
+    sont déjà comptés dans leur parent) ; le classement inclut aussi leurs
+    dépendances directes pour voir ce qui coûte dans un module du dépôt.
+    """
+    modules = {
+        name: (depth, us) for name, (depth, us) in _importtime(code).items()
+        if name not in startup_modules
+    }
+    total = sum(us for depth, us in modules.values() if depth == 0)
+    top = sorted(
+        ((name, us) for name, (depth, us) in modules.items() if depth <= 1),
+        key=lambda item: item[1], reverse=True
+    )[:5]
+    return total / 1000, {name: us / 1000 for name, us in top}
+
+
+def run(runs):
+    """Mesure chaque cible `runs` fois et garde la médiane"""
+    startup_modules = set(_importtime('pass'))
+    results = {}
+    for target, code in TARGETS.items():
+        samples = [measure(code, startup_modules) for _ in range(runs)]
+        totals = [total for total, _ in samples]
+        median = statistics.median(totals)
+        top = samples[totals.index(min(totals, key=lambda total: abs(total - median)))][1]
+        results[target] = {
+            'total_ms': round(median, 1),
+            'top_ms': {name: round(ms, 1) for name, ms in top.items()},
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='régression tolérée par rapport à la référence (0.25 = +25%%)')
+    parser.add_argument('--update', action='store_true', help='réécrit la référence')
+    args = parser.parse_args()
+
+    results = run(args.runs)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f).get('targets', {})
+
+    print(f"{'Cible':<20}{'Référence (ms)':>16}{'Mesure (ms)':>14}  Modules les plus coûteux")
+    regressions = []
+    for target, result in results.items():
+        reference = baseline.get(target, {}).get('total_ms')
+        top = ', '.join(f"{name} {ms:.0f}" for name, ms in result['top_ms'].items())
+        print(f"{target:<20}{reference if reference is not None else '-':>16}{result['total_ms']:>14.1f}  {top}")
+        if reference and result['total_ms'] > reference * (1 + args.tolerance):
+            regressions.append(target)
+
+    if args.update:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'runs': args.runs,
+                'targets': results,
+            }, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"\n💾 Référence mise à jour: {BASELINE_PATH}")
+    elif regressions:
+        print(f"\n❌ Régression du temps d'import: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
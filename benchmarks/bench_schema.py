@@ -0,0 +1,168 @@
+"""
+Benchmark taille / temps de scan : ancien schéma availability vs schéma compact
+
+Construit une base à l'ancien schéma (historique synthétique), mesure la
+taille du fichier et des requêtes typiques du dashboard, applique la
+migration en ligne (db/schema.py) puis refait les mêmes mesures.
+
+Usage :
+    python -m benchmarks.bench_schema --stations 1500 --snapshots 288
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db.schema import migrate_to_compact
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE stations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        station_id TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        capacity INTEGER,
+        nom_arrondissement_communes TEXT,
+        coordonnees_geo TEXT,
+        code_insee_commune TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE availability (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        station_id TEXT NOT NULL,
+        ebikes INTEGER,
+        mechanical_bikes INTEGER,
+        docks_available INTEGER,
+        bikes_available INTEGER,
+        is_installed BOOLEAN,
+        is_renting BOOLEAN,
+        is_returning BOOLEAN,
+        duedate TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (station_id) REFERENCES stations (station_id)
+    );
+    CREATE INDEX idx_availability_station_time ON availability(station_id, timestamp);
+    CREATE INDEX idx_stations_id ON stations(station_id);
+'''
+
+# Requêtes équivalentes sur les deux schémas
+QUERIES = {
+    'latest_per_station': (
+        '''SELECT s.name, a.ebikes, a.mechanical_bikes FROM stations s
+           JOIN availability a ON s.station_id = a.station_id
+           WHERE a.timestamp = (SELECT MAX(timestamp) FROM availability WHERE station_id = s.station_id)''',
+        '''SELECT s.name, a.ebikes, a.mechanical_bikes FROM stations s
+           JOIN availability a ON a.station_key = s.id
+           WHERE a.ts = (SELECT MAX(ts) FROM availability WHERE station_key = s.id)''',
+    ),
+    'hourly_24h': (
+        '''SELECT substr(a.timestamp, 1, 13), AVG(a.ebikes + a.mechanical_bikes) FROM availability a
+           WHERE a.is_installed = 1 AND a.timestamp >= :since_text GROUP BY 1''',
+        '''SELECT a.ts / 3600, AVG(a.ebikes + a.mechanical_bikes) FROM availability a
+           WHERE (a.flags & 1) = 1 AND a.ts >= :since_ts GROUP BY 1''',
+    ),
+    'one_station_history': (
+        '''SELECT a.timestamp, a.bikes_available FROM availability a
+           WHERE a.station_id = :station_id ORDER BY a.timestamp''',
+        '''SELECT a.ts, a.bikes_available FROM availability a
+           JOIN stations s ON s.id = a.station_key
+           WHERE s.station_id = :station_id ORDER BY a.ts''',
+    ),
+}
+
+
+def build_legacy_db(path, stations, snapshots, interval=300):
+    """Crée une base à l'ancien schéma avec `snapshots` relevés par station"""
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany(
+        'INSERT INTO stations (station_id, name, capacity) VALUES (?, ?, ?)',
+        [(str(10000 + i), f'Station {i}', 30) for i in range(stations)]
+    )
+
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(seconds=interval * snapshots)
+    for snapshot in range(snapshots):
+        timestamp = (start + timedelta(seconds=interval * snapshot)).strftime('%Y-%m-%d %H:%M:%S')
+        conn.executemany('''
+            INSERT INTO availability
+            (station_id, ebikes, mechanical_bikes, docks_available, bikes_available,
+             is_installed, is_renting, is_returning, duedate, timestamp)
+            VALUES (?, ?, ?, ?, ?, 1, 1, 1, ?, ?)
+        ''', [
+            (str(10000 + i), ebikes, mechanical, 30 - ebikes - mechanical, ebikes + mechanical,
+             '2024-01-01T00:00:00+00:00', timestamp)
+            for i in range(stations)
+            for ebikes, mechanical in [(rng.randint(0, 10), rng.randint(0, 10))]
+        ])
+    conn.commit()
+    return conn
+
+
+def db_size(conn):
+    """Taille de la base en octets (page_count * page_size)"""
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    return page_count * page_size
+
+
+def time_queries(conn, variant, params, repeat):
+    """Meilleur temps (ms) de chaque requête sur `repeat` exécutions"""
+    results = {}
+    for name, queries in QUERIES.items():
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(queries[variant], params).fetchall()
+            best = min(best, time.perf_counter() - started)
+        results[name] = best * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--stations', type=int, default=1500)
+    parser.add_argument('--snapshots', type=int, default=288, help='288 relevés = 24h toutes les 5 minutes')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        print(f"🏗️ Construction: {args.stations} stations x {args.snapshots} relevés")
+        conn = build_legacy_db(path, args.stations, args.snapshots)
+        conn.execute('VACUUM')
+        conn.execute('ANALYZE')
+
+        since = datetime.now() - timedelta(hours=24)
+        params = {
+            'since_text': since.strftime('%Y-%m-%d %H:%M:%S'),
+            'since_ts': int(since.timestamp()),
+            'station_id': str(10000 + args.stations // 2),
+        }
+
+        size_before = db_size(conn)
+        before = time_queries(conn, 0, params, args.repeat)
+
+        started = time.perf_counter()
+        migrate_to_compact(conn)
+        migration_s = time.perf_counter() - started
+        conn.execute('VACUUM')
+        conn.execute('ANALYZE')
+
+        size_after = db_size(conn)
+        after = time_queries(conn, 1, params, args.repeat)
+        conn.close()
+
+    print(f"\n⏱️ Migration en ligne: {migration_s:.2f} s")
+    print(f"\n{'Mesure':<24}{'Ancien':>14}{'Compact':>14}{'Gain':>10}")
+    print(f"{'taille (Mo)':<24}{size_before / 1e6:>14.2f}{size_after / 1e6:>14.2f}"
+          f"{size_before / size_after:>9.1f}x")
+    for name in QUERIES:
+        print(f"{name + ' (ms)':<24}{before[name]:>14.2f}{after[name]:>14.2f}"
+              f"{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,11 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
 import os
 
+# pandas et plotly ne sont pas importés ici : Streamlit exécute ce script à
+# chaque interaction et le premier affichage ne doit pas attendre leur chargement.
+# Ils sont importés au moment où une section en a besoin (voir aussi serve.py).
+
 # Configuration de la page
 st.set_page_config(
     page_title="Dashboard Vélib - Paris",
@@ -15,119 +14,18 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Cache des données avec timeout
-@st.cache_data(ttl=300)  # 5 minutes
-def load_data():
-    """Charge les données depuis la base SQLite"""
-    try:
-        db_path = os.getenv('DB_PATH', './db/data/velib.db')
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        
-        # Requête optimisée pour les données récentes
-        query = """
-        SELECT 
-            s.name, 
-            s.nom_arrondissement_communes as arrondissement,
-            s.capacity,
-            a.ebikes, 
-            a.mechanical_bikes, 
-            a.docks_available,
-            a.timestamp,
-            s.coordonnees_geo,
-            (a.ebikes + a.mechanical_bikes) as total_bikes,
-            CASE 
-                WHEN s.capacity > 0 THEN ROUND((a.ebikes + a.mechanical_bikes) * 100.0 / s.capacity, 1)
-                ELSE 0 
-            END as occupancy_rate
-        FROM stations s
-        JOIN availability a ON s.station_id = a.station_id
-        WHERE a.is_installed = 1
-        ORDER BY a.timestamp DESC
-        LIMIT 1000
-        """
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        # Traitement des coordonnées
-        if not df.empty and 'coordonnees_geo' in df.columns:
-            df[['lat', 'lon']] = df['coordonnees_geo'].apply(
-                lambda x: pd.Series(parse_coordinates(x))
-            )
-        
-        return df
-        
-    except Exception as e:
-        st.error(f"❌ Erreur base de données: {e}")
-        return pd.DataFrame()
-
-@st.cache_data(ttl=3600)  # 1 heure pour les données historiques
-def load_historical_data(hours=24):
-    """Charge les données historiques des 24 dernières heures"""
-    try:
-        db_path = os.getenv('DB_PATH', './db/data/velib.db')
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        
-        # Calcul de la date de début (24h avant maintenant)
-        start_time = datetime.now() - timedelta(hours=hours)
-        
-        query = f"""
-        SELECT 
-            s.name,
-            s.nom_arrondissement_communes as arrondissement,
-            a.ebikes, 
-            a.mechanical_bikes,
-            a.docks_available,
-            a.timestamp,
-            (a.ebikes + a.mechanical_bikes) as total_bikes,
-            CASE 
-                WHEN s.capacity > 0 THEN ROUND((a.ebikes + a.mechanical_bikes) * 100.0 / s.capacity, 1)
-                ELSE 0 
-            END as occupancy_rate
-        FROM stations s
-        JOIN availability a ON s.station_id = a.station_id
-        WHERE a.is_installed = 1 
-        AND a.timestamp >= '{start_time.strftime('%Y-%m-%d %H:%M:%S')}'
-        ORDER BY a.timestamp
-        """
-        
-        df_hist = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        if not df_hist.empty:
-            # Conversion du timestamp et extraction de l'heure
-            df_hist['timestamp'] = pd.to_datetime(df_hist['timestamp'])
-            df_hist['heure'] = df_hist['timestamp'].dt.floor('H')  # Agrégation par heure
-            
-        return df_hist
-        
-    except Exception as e:
-        st.error(f"❌ Erreur données historiques: {e}")
-        return pd.DataFrame()
-
-def parse_coordinates(coord_str):
-    """Parse les coordonnées géographiques"""
-    if not coord_str:
-        return None, None
-    try:
-        coords = json.loads(coord_str)
-        return coords.get('lat'), coords.get('lon')
-    except:
-        return None, None
+# Période de rafraîchissement automatique des KPI (secondes)
+KPI_REFRESH_INTERVAL = int(os.getenv('DASHBOARD_KPI_REFRESH', '60'))
 
-def create_historical_analysis(df_hist, selected_arrondissement):
-    """Crée les visualisations historiques"""
-    if df_hist.empty:
-        st.info("📊 Données historiques insuffisantes pour l'analyse temporelle")
-        return
-    
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def aggregate_hourly(df_hist, selected_arrondissement):
+    """Agrège l'historique par heure pour un arrondissement (mémoïsé sur ces entrées)"""
     # Filtrage par arrondissement si sélectionné
     if selected_arrondissement != 'Tous':
         df_hist = df_hist[df_hist['arrondissement'] == selected_arrondissement]
     
     if df_hist.empty:
-        st.info("📊 Aucune donnée historique pour cet arrondissement")
-        return
+        return df_hist
     
     # Agrégation par heure
     hourly_data = df_hist.groupby('heure').agg({
@@ -139,6 +37,12 @@ def create_historical_analysis(df_hist, selected_arrondissement):
     }).reset_index()
     
     hourly_data['heure_str'] = hourly_data['heure'].dt.strftime('%H:%M')
+    return hourly_data
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def build_history_figures(hourly_data):
+    """Construit les trois graphiques historiques (mémoïsé sur les données agrégées)"""
+    import plotly.graph_objects as go
     
     # Graphique 1: Évolution globale sur 24h
     fig_evolution = go.Figure()
@@ -169,60 +73,76 @@ def create_historical_analysis(df_hist, selected_arrondissement):
         height=400
     )
     
+    # Graphique 2: Comparaison vélos électriques vs mécaniques
+    fig_bike_types = go.Figure()
+    
+    fig_bike_types.add_trace(go.Scatter(
+        x=hourly_data['heure_str'],
+        y=hourly_data['ebikes'],
+        mode='lines+markers',
+        name='🔌 Vélos électriques',
+        line=dict(color='#2ca02c', width=3)
+    ))
+    
+    fig_bike_types.add_trace(go.Scatter(
+        x=hourly_data['heure_str'],
+        y=hourly_data['mechanical_bikes'],
+        mode='lines+markers',
+        name='⚙️ Vélos mécaniques',
+        line=dict(color='#d62728', width=3)
+    ))
+    
+    fig_bike_types.update_layout(
+        title='📊 Répartition par type de vélo',
+        xaxis_title='Heure',
+        yaxis_title='Nombre moyen',
+        height=350
+    )
+    
+    # Graphique 3: Taux d'occupation
+    fig_occupancy = go.Figure()
+    
+    fig_occupancy.add_trace(go.Scatter(
+        x=hourly_data['heure_str'],
+        y=hourly_data['occupancy_rate'],
+        mode='lines+markers',
+        name='Taux d\'occupation',
+        line=dict(color='#9467bd', width=3),
+        fill='tozeroy'
+    ))
+    
+    fig_occupancy.update_layout(
+        title='📈 Taux d\'occupation moyen',
+        xaxis_title='Heure',
+        yaxis_title='Taux d\'occupation (%)',
+        yaxis=dict(range=[0, 100]),
+        height=350
+    )
+    
+    return fig_evolution, fig_bike_types, fig_occupancy
+
+def create_historical_analysis(df_hist, selected_arrondissement):
+    """Crée les visualisations historiques"""
+    if df_hist.empty:
+        st.info("📊 Données historiques insuffisantes pour l'analyse temporelle")
+        return
+    
+    hourly_data = aggregate_hourly(df_hist, selected_arrondissement)
+    
+    if hourly_data.empty:
+        st.info("📊 Aucune donnée historique pour cet arrondissement")
+        return
+    
+    fig_evolution, fig_bike_types, fig_occupancy = build_history_figures(hourly_data)
+    
     st.plotly_chart(fig_evolution, use_container_width=True)
     
-    # Graphique 2: Comparaison vélos électriques vs mécaniques
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_bike_types = go.Figure()
-        
-        fig_bike_types.add_trace(go.Scatter(
-            x=hourly_data['heure_str'],
-            y=hourly_data['ebikes'],
-            mode='lines+markers',
-            name='🔌 Vélos électriques',
-            line=dict(color='#2ca02c', width=3)
-        ))
-        
-        fig_bike_types.add_trace(go.Scatter(
-            x=hourly_data['heure_str'],
-            y=hourly_data['mechanical_bikes'],
-            mode='lines+markers',
-            name='⚙️ Vélos mécaniques',
-            line=dict(color='#d62728', width=3)
-        ))
-        
-        fig_bike_types.update_layout(
-            title='📊 Répartition par type de vélo',
-            xaxis_title='Heure',
-            yaxis_title='Nombre moyen',
-            height=350
-        )
-        
         st.plotly_chart(fig_bike_types, use_container_width=True)
     
     with col2:
-        # Graphique 3: Taux d'occupation
-        fig_occupancy = go.Figure()
-        
-        fig_occupancy.add_trace(go.Scatter(
-            x=hourly_data['heure_str'],
-            y=hourly_data['occupancy_rate'],
-            mode='lines+markers',
-            name='Taux d\'occupation',
-            line=dict(color='#9467bd', width=3),
-            fill='tozeroy'
-        ))
-        
-        fig_occupancy.update_layout(
-            title='📈 Taux d\'occupation moyen',
-            xaxis_title='Heure',
-            yaxis_title='Taux d\'occupation (%)',
-            yaxis=dict(range=[0, 100]),
-            height=350
-        )
-        
         st.plotly_chart(fig_occupancy, use_container_width=True)
     
     # Métriques résumées
@@ -247,62 +167,26 @@ def create_historical_analysis(df_hist, selected_arrondissement):
         avg_occupancy = hourly_data['occupancy_rate'].mean()
         st.metric("🏪 Occupation moyenne", f"{avg_occupancy:.1f}%")
 
-def main():
-    # Header principal
-    st.title("🚴 Dashboard Vélib - Paris")
-    st.markdown("### Surveillance en temps réel et analyse historique des stations Vélib")
-    
-    # Sidebar - Contrôles
-    with st.sidebar:
-        st.title("🎛️ Contrôles")
-        
-        # Actualisation manuelle
-        if st.button("🔄 Actualiser maintenant", use_container_width=True):
-            st.cache_data.clear()
-            st.rerun()
-        
-        st.divider()
-        
-        # Filtres
-        st.subheader("🔧 Filtres")
-    
-    # Chargement des données
-    with st.spinner("📊 Chargement des données..."):
-        df = load_data()
-        df_hist = load_historical_data(24)  # 24 heures d'historique
+def filter_by_arrondissement(df, selected_arrondissement):
+    """Application du filtre par arrondissement"""
+    if selected_arrondissement != 'Tous':
+        return df[df['arrondissement'] == selected_arrondissement]
+    return df.copy()
+
+# Chaque section est un fragment ou s'appuie sur des calculs mémoïsés :
+# un widget propre à une section (recherche, nombre de lignes, seuil
+# d'alerte) ne relance que cette section, et un changement de filtre global
+# ne recalcule que les figures dont les données d'entrée ont changé.
+
+@st.fragment(run_every=KPI_REFRESH_INTERVAL)
+def kpi_section(db_path, selected_arrondissement):
+    """Section 1 : KPI, rafraîchis périodiquement sans redessiner le reste de la page"""
+    from loaders import load_data
     
-    # Gestion des données manquantes
+    df = load_data(db_path)
     if df.empty:
-        st.error("""
-        ❌ Aucune donnée disponible
-        
-        **Solutions possibles :**
-        - Vérifiez que le service d'ingestion est en cours d'exécution
-        - Attendez 2-3 minutes après le démarrage
-        - Vérifiez que la base de données existe
-        """)
-        
-        if st.button("🔄 Réessayer le chargement"):
-            st.cache_data.clear()
-            st.rerun()
         return
-    
-    # Filtre par arrondissement
-    arrondissements = ['Tous'] + sorted(df['arrondissement'].dropna().unique().tolist())
-    selected_arrondissement = st.sidebar.selectbox(
-        "🏘️ Arrondissement", 
-        arrondissements,
-        help="Filtrer par arrondissement"
-    )
-    
-    # Application du filtre
-    if selected_arrondissement != 'Tous':
-        df_filtered = df[df['arrondissement'] == selected_arrondissement]
-    else:
-        df_filtered = df.copy()
-    
-    # ===== SECTION 1: KPI PRINCIPAUX =====
-    st.header("📊 Tableau de bord en temps réel")
+    df_filtered = filter_by_arrondissement(df, selected_arrondissement)
     
     # KPI en grille responsive
     kpi1, kpi2, kpi3, kpi4 = st.columns(4)
@@ -359,67 +243,100 @@ def main():
             help="Pourcentage de vélos disponibles par rapport à la capacité totale"
         )
     
-    # ===== SECTION 2: CARTE INTERACTIVE =====
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def build_map_figure(df_filtered):
+    """Construit la carte des stations (mémoïsé sur les stations filtrées)"""
+    map_data = df_filtered[['lat', 'lon', 'name', 'ebikes', 'mechanical_bikes', 'docks_available']].dropna()
+    
+    if map_data.empty:
+        return None
+    
+    import plotly.express as px
+    
+    # Préparation des données pour la carte
+    map_data['total_bikes'] = map_data['ebikes'] + map_data['mechanical_bikes']
+    map_data['size'] = map_data['total_bikes'].apply(lambda x: min(max(x * 2, 5), 30))
+    
+    # Création de la carte
+    fig = px.scatter_mapbox(
+        map_data,
+        lat="lat",
+        lon="lon",
+        size="size",
+        color="ebikes",
+        hover_name="name",
+        hover_data={"ebikes": True, "mechanical_bikes": True, "docks_available": True},
+        color_continuous_scale="viridis",
+        size_max=20,
+        zoom=11,
+        height=500,
+        title="Localisation des stations Vélib"
+    )
+    
+    fig.update_layout(
+        mapbox_style="open-street-map",
+        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+        showlegend=False
+    )
+    
+    return fig
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def build_bike_type_pie(ebikes, mechanical_bikes):
+    """Camembert électriques / mécaniques (mémoïsé sur les deux totaux)"""
+    import plotly.express as px
+    
+    return px.pie(
+        values=[ebikes, mechanical_bikes],
+        names=['Vélos Électriques', 'Vélos Mécaniques'],
+        title="Répartition des vélos disponibles",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def build_top_stations_bar(top_stations):
+    """Top 10 des stations (mémoïsé sur les 10 lignes affichées)"""
+    import plotly.express as px
+    
+    return px.bar(
+        top_stations,
+        x='total_bikes',
+        y='name',
+        orientation='h',
+        title="Stations avec le plus de vélos disponibles",
+        labels={'total_bikes': 'Nombre total de vélos', 'name': 'Station'},
+        color='total_bikes',
+        color_continuous_scale='viridis'
+    )
+
+def map_section(df_filtered):
+    """Section 2 : carte interactive"""
     st.header("🗺️ Carte des stations")
     
     if 'lat' in df_filtered.columns and 'lon' in df_filtered.columns:
-        map_data = df_filtered[['lat', 'lon', 'name', 'ebikes', 'mechanical_bikes', 'docks_available']].dropna()
+        fig = build_map_figure(df_filtered)
         
-        if not map_data.empty:
-            # Préparation des données pour la carte
-            map_data['total_bikes'] = map_data['ebikes'] + map_data['mechanical_bikes']
-            map_data['size'] = map_data['total_bikes'].apply(lambda x: min(max(x * 2, 5), 30))
-            map_data['station_info'] = map_data.apply(
-                lambda row: f"{row['name']}<br>🔌 {row['ebikes']} électriques<br>⚙️ {row['mechanical_bikes']} mécaniques<br>🅿️ {row['docks_available']} places",
-                axis=1
-            )
-            
-            # Création de la carte
-            fig = px.scatter_mapbox(
-                map_data,
-                lat="lat",
-                lon="lon",
-                size="size",
-                color="ebikes",
-                hover_name="name",
-                hover_data={"ebikes": True, "mechanical_bikes": True, "docks_available": True},
-                color_continuous_scale="viridis",
-                size_max=20,
-                zoom=11,
-                height=500,
-                title="Localisation des stations Vélib"
-            )
-            
-            fig.update_layout(
-                mapbox_style="open-street-map",
-                margin={"r": 0, "t": 40, "l": 0, "b": 0},
-                showlegend=False
-            )
-            
+        if fig is not None:
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.warning("⚠️ Aucune donnée de localisation disponible")
     else:
         st.info("🗺️ Les données de localisation ne sont pas disponibles")
-    
-    # ===== SECTION 3: ANALYSES AVANCÉES =====
+
+def charts_section(df_filtered):
+    """Section 3 : répartition par type et top 10"""
     col1, col2 = st.columns(2)
     
     with col1:
         st.header("📊 Répartition par type de vélo")
         
         # Graphique en camembert
-        bike_types = ['Vélos Électriques', 'Vélos Mécaniques']
-        bike_counts = [df_filtered['ebikes'].sum(), df_filtered['mechanical_bikes'].sum()]
+        ebikes = int(df_filtered['ebikes'].sum())
+        mechanical_bikes = int(df_filtered['mechanical_bikes'].sum())
         
-        if sum(bike_counts) > 0:
-            fig_pie = px.pie(
-                values=bike_counts,
-                names=bike_types,
-                title="Répartition des vélos disponibles",
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            st.plotly_chart(fig_pie, use_container_width=True)
+        if ebikes + mechanical_bikes > 0:
+            st.plotly_chart(build_bike_type_pie(ebikes, mechanical_bikes), use_container_width=True)
         else:
             st.info("📊 Aucun vélo disponible pour l'analyse")
     
@@ -430,23 +347,13 @@ def main():
         top_stations = df_filtered.nlargest(10, 'total_bikes')[['name', 'arrondissement', 'total_bikes', 'ebikes', 'mechanical_bikes']]
         
         if not top_stations.empty:
-            fig_bar = px.bar(
-                top_stations,
-                x='total_bikes',
-                y='name',
-                orientation='h',
-                title="Stations avec le plus de vélos disponibles",
-                labels={'total_bikes': 'Nombre total de vélos', 'name': 'Station'},
-                color='total_bikes',
-                color_continuous_scale='viridis'
-            )
-            st.plotly_chart(fig_bar, use_container_width=True)
+            st.plotly_chart(build_top_stations_bar(top_stations), use_container_width=True)
         else:
             st.info("🏆 Données insuffisantes pour le classement")
-    
-    # ===== SECTION 4: DONNÉES DÉTAILLÉES =====
-    st.header("📋 Données détaillées par station")
-    
+
+@st.fragment
+def table_section(df_filtered):
+    """Section 4 : tableau détaillé, seul relancé quand la recherche change"""
     # Options d'affichage
     col1, col2 = st.columns([2, 1])
     
@@ -479,11 +386,111 @@ def main():
     else:
         st.info("🔍 Aucune station ne correspond à votre recherche")
     
-    # ===== SECTION 5: ANALYSE HISTORIQUE 24H (MAINTENANT EN BAS) =====
+
+@st.fragment
+def alerts_section(db_path, selected_arrondissement):
+    """Section 5 : alertes de rééquilibrage, seule relancée quand le seuil change"""
+    from loaders import load_alerts
+    
+    alert_minutes = st.selectbox("Vide ou pleine depuis plus de (minutes)", [15, 30, 60, 120], index=1)
+    df_alerts = load_alerts(db_path, alert_minutes)
+    
+    if selected_arrondissement != 'Tous' and not df_alerts.empty:
+        df_alerts = df_alerts[df_alerts['arrondissement'] == selected_arrondissement]
+    
+    if not df_alerts.empty:
+        st.dataframe(
+            df_alerts[['name', 'arrondissement', 'etat', 'duree_min']],
+            use_container_width=True
+        )
+        st.caption(f"🚨 {len(df_alerts)} stations à rééquilibrer")
+    else:
+        st.success("✅ Aucune station vide ou pleine au-delà du seuil")
+    
+
+def main():
+    # Header principal
+    st.title("🚴 Dashboard Vélib - Paris")
+    st.markdown("### Surveillance en temps réel et analyse historique des stations Vélib")
+    
+    # Sidebar - Contrôles
+    with st.sidebar:
+        st.title("🎛️ Contrôles")
+        
+        # Actualisation manuelle
+        if st.button("🔄 Actualiser maintenant", use_container_width=True):
+            st.cache_data.clear()
+            st.rerun()
+        
+        st.divider()
+        
+        # Filtres
+        st.subheader("🔧 Filtres")
+        
+        # Chargement différé de pandas : l'en-tête est déjà affiché
+        from loaders import list_feed_databases, load_data, load_historical_data
+        
+        # Choix du réseau (un fichier SQLite par flux d'ingestion)
+        feeds = list_feed_databases()
+        selected_feed = st.selectbox("🌍 Réseau", list(feeds.keys())) if len(feeds) > 1 else next(iter(feeds), None)
+        db_path = feeds.get(selected_feed)
+    
+    # Chargement des données (aucune base tant que l'ingestion n'a pas démarré)
+    df = df_hist = None
+    if db_path:
+        with st.spinner("📊 Chargement des données..."):
+            df = load_data(db_path)
+            df_hist = load_historical_data(db_path, 24)  # 24 heures d'historique
+    
+    # Gestion des données manquantes
+    if df is None or df.empty:
+        st.error("""
+        ❌ Aucune donnée disponible
+        
+        **Solutions possibles :**
+        - Vérifiez que le service d'ingestion est en cours d'exécution
+        - Attendez 2-3 minutes après le démarrage
+        - Vérifiez que la base de données existe
+        """)
+        
+        if st.button("🔄 Réessayer le chargement"):
+            st.cache_data.clear()
+            st.rerun()
+        return
+    
+    # Filtre par arrondissement
+    arrondissements = ['Tous'] + sorted(df['arrondissement'].dropna().unique().tolist())
+    selected_arrondissement = st.sidebar.selectbox(
+        "🏘️ Arrondissement", 
+        arrondissements,
+        help="Filtrer par arrondissement"
+    )
+    
+    df_filtered = filter_by_arrondissement(df, selected_arrondissement)
+    
+    # ===== SECTION 1: KPI PRINCIPAUX =====
+    st.header("📊 Tableau de bord en temps réel")
+    kpi_section(db_path, selected_arrondissement)
+    
+    # ===== SECTION 2: CARTE INTERACTIVE =====
+    map_section(df_filtered)
+    
+    # ===== SECTION 3: ANALYSES AVANCÉES =====
+    charts_section(df_filtered)
+    
+    # ===== SECTION 4: DONNÉES DÉTAILLÉES =====
+    st.header("📋 Données détaillées par station")
+    table_section(df_filtered)
+    
+    # ===== SECTION 5: ALERTES DE RÉÉQUILIBRAGE =====
+    st.header("🚨 Alertes de rééquilibrage")
+    alerts_section(db_path, selected_arrondissement)
+    
+    # ===== SECTION 6: ANALYSE HISTORIQUE 24H (MAINTENANT EN BAS) =====
     st.header("🕐 Analyse historique sur 24 heures")
     create_historical_analysis(df_hist, selected_arrondissement)
     
-    # ===== SECTION 6: INFORMATIONS TECHNIQUES =====
+    # ===== SECTION 7: INFORMATIONS TECHNIQUES =====
     with st.expander("ℹ️ Informations techniques"):
         st.write(f"**Dernière mise à jour:** {datetime.now().strftime('%H:%M:%S')}")
         st.write(f"**Nombre total de stations:** {len(df)}")
@@ -491,7 +498,7 @@ def main():
         st.write(f"**Données chargées:** {len(df_filtered)} stations")
         
         if 'timestamp' in df.columns and not df.empty:
-            latest_timestamp = pd.to_datetime(df['timestamp']).max()
+            latest_timestamp = df['timestamp'].max()
             st.write(f"**Dernière actualisation des données:** {latest_timestamp}")
         
         if not df_hist.empty:
@@ -505,5 +512,6 @@ def main():
         st.cache_data.clear()
         st.rerun()
 
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+Chargement des données du dashboard depuis SQLite
+
+Module séparé de app.py pour que pandas ne soit importé qu'une fois l'en-tête
+affiché, et pour que serve.py puisse préremplir les caches au démarrage
+(même module, mêmes clés de cache que lors de l'exécution du script).
+"""
+import streamlit as st
+import sqlite3
+import pandas as pd
+from datetime import datetime, timedelta
+import json
+import os
+
+DB_PATH = os.getenv('DB_PATH', './db/data/velib.db')
+
+def is_feed_database(path):
+    """Vrai si `path` est une base d'ingestion existante (table stations présente)
+    
+    Ouverture en lecture seule : sqlite3.connect créerait sinon un fichier vide.
+    """
+    if not os.path.isfile(path):
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stations'"
+            ).fetchone() is not None
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+def list_feed_databases():
+    """Liste les bases d'ingestion existantes, une par flux (réseau par défaut en premier)"""
+    data_dir = os.path.dirname(DB_PATH) or '.'
+    candidates = {'velib': DB_PATH}
+    if os.path.isdir(data_dir):
+        for file_name in sorted(os.listdir(data_dir)):
+            path = os.path.join(data_dir, file_name)
+            if file_name.endswith('.db') and path != DB_PATH:
+                candidates[file_name[:-3]] = path
+    return {name: path for name, path in candidates.items() if is_feed_database(path)}
+
+# Cache des données avec timeout
+@st.cache_data(ttl=300)  # 5 minutes
+def load_data(db_path=DB_PATH):
+    """Charge les données depuis la base SQLite"""
+    try:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        
+        # Requête optimisée pour les données récentes
+        query = """
+        SELECT 
+            s.name, 
+            s.nom_arrondissement_communes as arrondissement,
+            s.capacity,
+            a.ebikes, 
+            a.mechanical_bikes, 
+            a.docks_available,
+            datetime(a.ts, 'unixepoch', 'localtime') as timestamp,
+            s.coordonnees_geo,
+            (a.ebikes + a.mechanical_bikes) as total_bikes,
+            CASE 
+                WHEN s.capacity > 0 THEN ROUND((a.ebikes + a.mechanical_bikes) * 100.0 / s.capacity, 1)
+                ELSE 0 
+            END as occupancy_rate
+        FROM stations s
+        JOIN availability a ON a.station_key = s.id
+        WHERE (a.flags & 1) = 1  -- station installée
+        AND a.ts = (SELECT MAX(ts) FROM availability WHERE station_key = s.id)  -- dernier relevé
+        ORDER BY a.ts DESC
+        LIMIT 1000
+        """
+        
+        df = pd.read_sql_query(query, conn)
+        conn.close()
+        
+        # Traitement des coordonnées
+        if not df.empty and 'coordonnees_geo' in df.columns:
+            df[['lat', 'lon']] = df['coordonnees_geo'].apply(
+                lambda x: pd.Series(parse_coordinates(x))
+            )
+        
+        return df
+        
+    except Exception as e:
+        st.error(f"❌ Erreur base de données: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=3600)  # 1 heure pour les données historiques
+def load_historical_data(db_path=DB_PATH, hours=24):
+    """Charge les données historiques des 24 dernières heures"""
+    try:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        
+        # Calcul de la date de début (24h avant maintenant, en epoch)
+        start_ts = int((datetime.now() - timedelta(hours=hours)).timestamp())
+        
+        query = """
+        SELECT 
+            s.name,
+            s.nom_arrondissement_communes as arrondissement,
+            a.ebikes, 
+            a.mechanical_bikes,
+            a.docks_available,
+            datetime(a.ts, 'unixepoch', 'localtime') as timestamp,
+            (a.ebikes + a.mechanical_bikes) as total_bikes,
+            CASE 
+                WHEN s.capacity > 0 THEN ROUND((a.ebikes + a.mechanical_bikes) * 100.0 / s.capacity, 1)
+                ELSE 0 
+            END as occupancy_rate
+        FROM stations s
+        JOIN availability a ON a.station_key = s.id
+        WHERE (a.flags & 1) = 1 
+        AND a.ts >= ?
+        ORDER BY a.ts
+        """
+        
+        df_hist = pd.read_sql_query(query, conn, params=(start_ts,))
+        conn.close()
+        
+        if not df_hist.empty:
+            # Conversion du timestamp et extraction de l'heure
+            df_hist['timestamp'] = pd.to_datetime(df_hist['timestamp'])
+            df_hist['heure'] = df_hist['timestamp'].dt.floor('H')  # Agrégation par heure
+            
+        return df_hist
+        
+    except Exception as e:
+        st.error(f"❌ Erreur données historiques: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=300)  # 5 minutes, aligné sur la fréquence d'ingestion
+def load_alerts(db_path=DB_PATH, min_minutes=30):
+    """Charge les stations vides ou pleines depuis plus de `min_minutes`"""
+    try:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        
+        # Horodatages en epoch : seuil et durées insensibles aux changements d'heure
+        now_ts = int(datetime.now().timestamp())
+        threshold = now_ts - min_minutes * 60
+        
+        # Lecture de l'état courant via l'index (state, since), sans parcourir l'historique
+        query = """
+        SELECT 
+            s.name,
+            s.nom_arrondissement_communes as arrondissement,
+            CASE st.state WHEN 1 THEN 'Vide' WHEN 2 THEN 'Pleine' END as etat,
+            datetime(st.since, 'unixepoch', 'localtime') as since,
+            (? - st.since) / 60 as duree_min
+        FROM station_state st
+        JOIN stations s ON s.id = st.station_key
+        WHERE st.state IN (1, 2) AND st.since <= ?
+        ORDER BY st.since
+        """
+        
+        df_alerts = pd.read_sql_query(query, conn, params=(now_ts, threshold))
+        conn.close()
+        
+        if not df_alerts.empty:
+            df_alerts['since'] = pd.to_datetime(df_alerts['since'])
+        
+        return df_alerts
+        
+    except Exception as e:
+        st.error(f"❌ Erreur alertes: {e}")
+        return pd.DataFrame()
+
+def parse_coordinates(coord_str):
+    """Parse les coordonnées géographiques"""
+    if not coord_str:
+        return None, None
+    try:
+        coords = json.loads(coord_str)
+        return coords.get('lat'), coords.get('lon')
+    except:
+        return None, None
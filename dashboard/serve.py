@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Lancement du serveur Streamlit avec préchargement (warm-up)
+
+Le serveur Streamlit exécute app.py dans ce même processus : les modules
+lourds (pandas, plotly) importés ici et les caches st.cache_data remplis
+par loaders.py sont réutilisés par la première session, qui n'a plus à
+payer l'import ni les requêtes SQLite.
+
+Usage :
+    python dashboard/serve.py [--server.port=8501 ...]
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+DASHBOARD_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(DASHBOARD_DIR, 'app.py')
+
+# Délai laissé au serveur pour démarrer avant le warm-up (le cache st.cache_data
+# doit être celui du runtime Streamlit)
+WARMUP_DELAY = float(os.getenv('DASHBOARD_WARMUP_DELAY', '2'))
+
+# Le warm-up appelle les fonctions en cache hors session : Streamlit signale
+# l'absence de ScriptRunContext à chaque appel, avertissement sans objet ici
+# (chemin du module selon la version de Streamlit).
+_SCRIPT_RUN_CONTEXT_LOGGERS = (
+    'streamlit.runtime.scriptrunner_utils.script_run_context',
+    'streamlit.runtime.scriptrunner.script_run_context',
+)
+
+
+def warm_up():
+    """Précharge les modules lourds et les caches de données du dashboard"""
+    time.sleep(WARMUP_DELAY)
+    started = time.perf_counter()
+
+    for logger_name in _SCRIPT_RUN_CONTEXT_LOGGERS:
+        logging.getLogger(logger_name).setLevel(logging.ERROR)
+
+    import pandas  # noqa: F401
+    import plotly.express  # noqa: F401
+    import plotly.graph_objects  # noqa: F401
+
+    # Même nom de module que l'import fait par app.py (dossier du script dans sys.path)
+    import loaders
+
+    # Seules les bases déjà créées par l'ingestion : un résultat vide resterait en cache
+    for db_path in loaders.list_feed_databases().values():
+        loaders.load_data(db_path)
+        loaders.load_historical_data(db_path, 24)
+        loaders.load_alerts(db_path, 30)
+
+    print(f"🔥 Warm-up terminé en {time.perf_counter() - started:.2f} s")
+
+
+def main():
+    sys.path.insert(0, DASHBOARD_DIR)
+    threading.Thread(target=warm_up, name='dashboard-warmup', daemon=True).start()
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ['streamlit', 'run', APP_PATH, *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import numpy as np
+
+# Codes d'état des stations (stockés en INTEGER dans station_state / station_events)
+STATE_OK = 0
+STATE_EMPTY = 1
+STATE_FULL = 2
+STATE_OFFLINE = 3
+
+STATE_LABELS = {
+    STATE_OK: 'ok',
+    STATE_EMPTY: 'empty',
+    STATE_FULL: 'full',
+    STATE_OFFLINE: 'offline',
+}
+
+# État "inconnu" pour une station jamais vue auparavant
+_STATE_UNKNOWN = -1
+
+
+def _column(stations_data, key):
+    """Extrait une colonne numérique du snapshot sous forme de tableau numpy"""
+    return np.fromiter(
+        (station.get(key) or 0 for station in stations_data),
+        dtype=np.int32,
+        count=len(stations_data)
+    )
+
+
+def compute_states(stations_data):
+    """Calcule l'état de chaque station du snapshot (opérations vectorisées)
+
+    Une station est hors service si elle n'est pas installée ou ne permet
+    plus la location / le retour ; sinon elle est vide (0 vélo), pleine
+    (0 place) ou normale.
+    """
+    bikes = _column(stations_data, 'bikes_available')
+    docks = _column(stations_data, 'docks_available')
+    installed = _column(stations_data, 'is_installed')
+    renting = _column(stations_data, 'is_renting')
+    returning = _column(stations_data, 'is_returning')
+
+    offline = (installed == 0) | (renting == 0) | (returning == 0)
+
+    return np.select(
+        [offline, bikes == 0, docks == 0],
+        [STATE_OFFLINE, STATE_EMPTY, STATE_FULL],
+        default=STATE_OK
+    ).astype(np.int8)
+
+
+def detect_station_events(conn, stations_data, ts, station_keys):
+    """Compare le snapshot courant au précédent et enregistre les transitions
+
+    L'état courant de chaque station est conservé dans `station_state`
+    (avec l'heure de début de l'épisode). Lorsqu'un épisode vide / plein /
+    hors service se termine, il est archivé dans `station_events` avec sa durée.
+    Une station absente du snapshot (retirée du flux) voit son épisode
+    clos et son état supprimé : elle ne reste pas indéfiniment en alerte.
+    `ts` est l'epoch du snapshot et `station_keys` les clés des stations,
+    dans l'ordre du snapshot : horodatages entiers, insensibles aux
+    changements d'heure. Retourne le nombre de stations ayant changé
+    d'état (sans commit : le snapshot entier est appliqué dans une seule
+    transaction).
+    """
+    if not stations_data:
+        return 0
+
+    cursor = conn.cursor()
+
+    new_states = compute_states(stations_data)
+
+    # État précédent, aligné sur l'ordre du snapshot
+    previous = {
+        station_key: (state, since)
+        for station_key, state, since in cursor.execute(
+            'SELECT station_key, state, since FROM station_state'
+        )
+    }
+    prev_states = np.fromiter(
+        (previous.get(station_key, (_STATE_UNKNOWN, None))[0] for station_key in station_keys),
+        dtype=np.int8,
+        count=len(station_keys)
+    )
+
+    changed = prev_states != new_states
+    closed = changed & (prev_states > STATE_OK)
+
+    # Stations disparues du flux : épisode clos, état supprimé
+    seen = set(station_keys)
+    missing = [station_key for station_key in previous if station_key not in seen]
+
+    # Archivage des épisodes terminés
+    events = [
+        (station_key, state, since, ts, ts - since)
+        for station_key in missing
+        for state, since in [previous[station_key]]
+        if state > STATE_OK
+    ]
+    for idx in np.flatnonzero(closed):
+        station_key = station_keys[idx]
+        since = previous[station_key][1]
+        events.append((station_key, int(prev_states[idx]), since, ts, ts - since))
+
+    cursor.executemany('''
+        INSERT INTO station_events
+        (station_key, state, started_at, ended_at, duration_s)
+        VALUES (?, ?, ?, ?, ?)
+    ''', events)
+
+    cursor.executemany(
+        'DELETE FROM station_state WHERE station_key = ?',
+        [(station_key,) for station_key in missing]
+    )
+
+    # Ouverture des nouveaux épisodes
+    cursor.executemany('''
+        INSERT OR REPLACE INTO station_state (station_key, state, since)
+        VALUES (?, ?, ?)
+    ''', [
+        (station_keys[idx], int(new_states[idx]), ts)
+        for idx in np.flatnonzero(changed)
+    ])
+
+    transitions = int(changed.sum())
+    if transitions:
+        counts = np.bincount(new_states[changed], minlength=len(STATE_LABELS))
+        print(f"🚨 {transitions} changements d'état "
+              f"(vides: {counts[STATE_EMPTY]}, pleines: {counts[STATE_FULL]}, "
+              f"hors service: {counts[STATE_OFFLINE]})")
+
+    return transitions
@@ -0,0 +1,112 @@
+import json
+import os
+import re
+
+from .utils import (
+    VELIB_API_URL, fetch_velib_data, transform_velib_data,
+    fetch_json_if_changed, transform_gbfs_information, transform_gbfs_status
+)
+
+DEFAULT_FEED_NAME = 'velib'
+DEFAULT_INTERVAL = 300  # 5 minutes en secondes
+DEFAULT_INFORMATION_INTERVAL = 3600  # station_information change rarement
+
+FEED_TYPES = ('opendata', 'gbfs')
+
+
+def feed_db_path(name):
+    """Chemin de la base SQLite d'un flux
+
+    Chaque flux écrit dans son propre fichier (partitionnement par flux) :
+    un cycle lent ou verrouillé sur un réseau ne bloque jamais les autres.
+    Le flux par défaut conserve DB_PATH, lu par le dashboard.
+    """
+    db_path = os.getenv('DB_PATH', './db/data/velib.db')
+    if name == DEFAULT_FEED_NAME:
+        return db_path
+    return os.path.join(os.path.dirname(db_path), f"{name}.db")
+
+
+def _normalize_feed(feed):
+    """Valide la configuration d'un flux et complète les valeurs par défaut"""
+    name = feed.get('name', '')
+    if not re.fullmatch(r'[A-Za-z0-9_-]+', name):
+        raise ValueError(f"Nom de flux invalide: {name!r}")
+
+    feed_type = feed.get('type', 'opendata')
+    if feed_type not in FEED_TYPES:
+        raise ValueError(f"Type de flux inconnu pour {name}: {feed_type!r}")
+
+    if feed_type == 'gbfs' and not (feed.get('station_information') and feed.get('station_status')):
+        raise ValueError(f"Le flux GBFS {name} doit définir station_information et station_status")
+
+    db_path = feed.get('db_path') or feed_db_path(name)
+
+    return {
+        **feed,
+        'name': name,
+        'type': feed_type,
+        'interval': int(feed.get('interval', DEFAULT_INTERVAL)),
+        'information_interval': int(feed.get('information_interval', DEFAULT_INFORMATION_INTERVAL)),
+        'db_path': db_path,
+        # Spool local des snapshots, à côté de la base du flux
+        'spool_path': feed.get('spool_path') or os.path.join(os.path.dirname(db_path), 'spool', f"{name}.spool"),
+    }
+
+
+def load_feeds():
+    """Charge la liste des flux à interroger
+
+    VELIB_FEEDS contient une liste JSON de flux, par exemple :
+        [{"name": "velib", "type": "opendata", "url": "https://...", "interval": 300},
+         {"name": "lyon", "type": "gbfs", "interval": 60, "information_interval": 3600,
+          "station_information": "https://.../station_information.json",
+          "station_status": "https://.../station_status.json"}]
+    À défaut, un seul flux opendata Paris est utilisé (URL lue dans VELIB_API).
+    """
+    raw_feeds = os.getenv('VELIB_FEEDS')
+    if raw_feeds:
+        feeds = [_normalize_feed(feed) for feed in json.loads(raw_feeds)]
+    else:
+        feeds = [_normalize_feed({
+            'name': DEFAULT_FEED_NAME,
+            'type': 'opendata',
+            'url': os.getenv('VELIB_API', VELIB_API_URL),
+        })]
+
+    names = [feed['name'] for feed in feeds]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Noms de flux dupliqués: {names}")
+
+    return feeds
+
+
+def fetch_feed(conn, feed):
+    """Récupère les données d'un flux au format de la base
+
+    Retourne un dict avec :
+      - 'stations' : données fixes à écrire (None si inchangées)
+      - 'availability' : données temps-réel à écrire (None si inchangées)
+      - 'cache' : validateurs HTTP à enregistrer après écriture
+    Pour GBFS, station_information n'est interrogé qu'après `information_interval`
+    (ou son ttl) et station_status selon son ttl ; les réponses 304 ou au
+    `last_updated` inchangé ne produisent aucune écriture.
+    """
+    if feed['type'] == 'gbfs':
+        information, information_cache = fetch_json_if_changed(
+            conn, feed['station_information'], feed['information_interval']
+        )
+        status, status_cache = fetch_json_if_changed(conn, feed['station_status'])
+        return {
+            'stations': transform_gbfs_information(information['data']['stations']) if information else None,
+            'availability': transform_gbfs_status(status['data']['stations']) if status else None,
+            'cache': [information_cache, status_cache],
+        }
+
+    # Le dataset opendata mélange données fixes et temps-réel
+    transformed = transform_velib_data(fetch_velib_data(feed.get('url')))
+    return {
+        'stations': transformed or None,
+        'availability': transformed or None,
+        'cache': [],
+    }
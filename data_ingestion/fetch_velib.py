@@ -1,131 +1,369 @@
 import time
-import schedule
-from .utils import fetch_velib_data, transform_velib_data, get_db_connection, init_database
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .utils import get_db_connection, save_fetch_cache
+from .feeds import load_feeds, fetch_feed
+from .spool import append_snapshot, read_spool, repair_spool, reject_snapshot, clear_spool
+from db.schema import init_database, pack_flags
 import os
 from datetime import datetime
 
 DB_PATH = os.getenv('DB_PATH', './db/data/velib.db')
 UPDATE_INTERVAL = 300  # 5 minutes en secondes
+MAX_WORKERS = int(os.getenv('INGESTION_WORKERS', '0'))  # 0 = un worker par flux
 
 def clear_old_data(conn):
-    """Supprime les données de disponibilité précédentes"""
+    """Supprime les données de disponibilité de plus de 24h (sans commit)
+    
+    Appelée une fois par déversement du spool : chaque snapshot est conservé
+    sous son propre ts, l'historique couvre la fenêtre lue par le dashboard.
+    """
     cursor = conn.cursor()
+    cursor.execute("DELETE FROM availability WHERE ts < CAST(strftime('%s', 'now', '-1 day') AS INTEGER)")
+
+def update_stations_data(conn, stations_data):
+    """Met à jour les informations des stations (données fixes)
     
-    # Option 1: Supprimer toutes les données de disponibilité
-    cursor.execute("DELETE FROM availability WHERE timestamp < datetime('now', '-1 day')")
+    Seules les stations nouvelles ou dont une information a changé sont
+    réécrites ; retourne le nombre de lignes écrites (sans commit).
+    Les stations connues passent par un UPDATE et non par un upsert :
+    avec AUTOINCREMENT, chaque INSERT en conflit consommerait une valeur
+    de séquence, et les clés des nouvelles stations grossiraient sans fin.
+    """
+    cursor = conn.cursor()
     
- 
+    existing = {station_id for (station_id,) in cursor.execute('SELECT station_id FROM stations')}
+    stations_by_id = {station['station_id']: station for station in stations_data}
     
-    conn.commit()
+    cursor.executemany('''
+        INSERT INTO stations 
+        (station_id, name, capacity, nom_arrondissement_communes, coordonnees_geo)
+        VALUES (:station_id, :name, :capacity, :nom_arrondissement_communes, :coordonnees_geo)
+    ''', [station for station_id, station in stations_by_id.items() if station_id not in existing])
+    written = cursor.rowcount
+    
+    cursor.executemany('''
+        UPDATE stations SET
+            name = :name,
+            capacity = :capacity,
+            nom_arrondissement_communes = :nom_arrondissement_communes,
+            coordonnees_geo = :coordonnees_geo
+        WHERE station_id = :station_id
+          AND (name IS NOT :name
+            OR capacity IS NOT :capacity
+            OR nom_arrondissement_communes IS NOT :nom_arrondissement_communes
+            OR coordonnees_geo IS NOT :coordonnees_geo)
+    ''', [station for station_id, station in stations_by_id.items() if station_id in existing])
+    
+    return max(written, 0) + max(cursor.rowcount, 0)
 
-def update_stations_data(conn, stations_data):
-    """Met à jour les informations des stations (données fixes)"""
+def get_station_keys(conn, station_ids):
+    """Retourne {station_id: station_key} en créant les stations encore inconnues
+    
+    Un flux GBFS peut publier le statut d'une station avant sa description :
+    elle est créée sans nom et complétée au prochain station_information.
+    Seules les stations absentes sont insérées (pas d'INSERT OR IGNORE, qui
+    consommerait une valeur de séquence par station à chaque snapshot) ;
+    pour opendata, déjà écrites par update_stations_data, il ne reste que la lecture.
+    """
     cursor = conn.cursor()
+    station_keys = dict(cursor.execute('SELECT station_id, id FROM stations'))
+    missing = [station_id for station_id in dict.fromkeys(station_ids) if station_id not in station_keys]
+    
+    if missing:
+        cursor.executemany(
+            "INSERT INTO stations (station_id, name) VALUES (?, '')",
+            [(station_id,) for station_id in missing]
+        )
+        station_keys = dict(cursor.execute('SELECT station_id, id FROM stations'))
     
-    for station in stations_data:
-        cursor.execute('''
-            INSERT OR REPLACE INTO stations 
-            (station_id, name, capacity, nom_arrondissement_communes, coordonnees_geo)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            station['station_id'],
-            station['name'],
-            station['capacity'],
-            station['nom_arrondissement_communes'],
-            station['coordonnees_geo']
-        ))
-    
-    conn.commit()
+    return station_keys
 
-def update_availability_data(conn, stations_data):
-    """Met à jour les disponibilités avec un timestamp précis"""
+def update_availability_data(conn, stations_data, ts=None, station_keys=None):
+    """Ajoute les disponibilités d'un snapshot sous un timestamp précis (sans commit)
+    
+    `ts` est l'heure de récupération du snapshot : un snapshot rejoué
+    depuis le spool garde son heure d'origine et s'ajoute à l'historique
+    (clé (station_key, ts)) ; la purge est faite par clear_old_data().
+    `station_keys` ({station_id: station_key}) évite une seconde lecture
+    quand l'appelant les a déjà.
+    """
     cursor = conn.cursor()
     
-    # Timestamp UNIQUE pour cette mise à jour
-    current_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
+    # Timestamp UNIQUE pour cette mise à jour (epoch, MÊME valeur pour TOUTES les stations)
+    ts = ts or int(time.time())
+    station_keys = station_keys or get_station_keys(conn, [station['station_id'] for station in stations_data])
     
-    # SUPPRIMER les anciennes données avant d'insérer les nouvelles
-    cursor.execute("DELETE FROM availability")
-    
-    for station in stations_data:
-        cursor.execute('''
-            INSERT INTO availability 
-            (station_id, ebikes, mechanical_bikes, docks_available, bikes_available,
-             is_installed, is_renting, is_returning, duedate, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            station['station_id'],
+    cursor.executemany('''
+        INSERT OR REPLACE INTO availability 
+        (station_key, ts, ebikes, mechanical_bikes, docks_available, bikes_available, flags, duedate)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (
+            station_keys[station['station_id']],
+            ts,
             station['ebikes'],
             station['mechanical_bikes'],
             station['docks_available'],
             station['bikes_available'],
-            station['is_installed'],
-            station['is_renting'],
-            station['is_returning'],
-            station['duedate'],
-            current_timestamp  # MÊME timestamp pour TOUTES les stations de cette mise à jour
-        ))
-    
-    conn.commit()
+            pack_flags(station['is_installed'], station['is_renting'], station['is_returning']),
+            station['duedate']
+        )
+        for station in stations_data
+    ])
+    
+    current_timestamp = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
     print(f"🕒 Timestamp de la mise à jour: {current_timestamp}")
+    
+    return current_timestamp
 
-def fetch_and_store_data():
-    """Tâche principale de récupération et stockage des données"""
-    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - 🔄 Mise à jour des données Vélib...")
+def apply_snapshot(conn, snapshot, name):
+    """Écrit un snapshot du spool dans la base (sans commit)"""
+    # Import différé : numpy n'est chargé que dans les workers
+    from .events import detect_station_events
     
+    stations_data = snapshot['stations']
+    availability_data = snapshot['availability']
+    
+    # Données fixes : seulement si station_information a changé
+    if stations_data:
+        written = update_stations_data(conn, stations_data)
+        print(f"🏪 [{name}] {written} stations nouvelles ou modifiées sur {len(stations_data)}")
+    
+    # Données temps-réel (un relevé par snapshot, à son heure de récupération)
+    if availability_data:
+        station_keys = get_station_keys(conn, [station['station_id'] for station in availability_data])
+        update_availability_data(conn, availability_data, snapshot['ts'], station_keys)
+        
+        # Détection des stations vides / pleines / hors service
+        detect_station_events(
+            conn, availability_data, snapshot['ts'],
+            [station_keys[station['station_id']] for station in availability_data]
+        )
+    
+    # Validateurs enregistrés uniquement avec les données qu'ils décrivent
+    save_fetch_cache(conn, snapshot['cache'])
+
+def _is_lock_error(error):
+    """Vrai pour les erreurs transitoires de verrouillage SQLite (à retenter)"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+def drain_spool(conn, feed):
+    """Déverse le spool d'un flux dans la base, en une seule transaction
+    
+    Les snapshots déjà présents dans spool_snapshots sont ignorés : un
+    rejeu après un arrêt entre le commit et la remise à zéro du spool
+    n'écrit rien deux fois. Si la base est verrouillée, le spool est
+    conservé et retenté au cycle suivant. Un snapshot dont l'écriture
+    échoue pour une autre raison (donnée invalide) est annulé seul
+    (SAVEPOINT) et déplacé dans `<spool>.rejected` : il ne bloque pas le
+    flux. Les snapshots rejetés sont eux aussi marqués dans spool_snapshots,
+    dans la même transaction, pour que le rejeu reste idempotent.
+    Retourne la liste des identifiants appliqués (None si la base est verrouillée).
+    """
+    name = feed['name']
+    snapshots, _ = read_spool(feed['spool_path'])
+    if not snapshots:
+        return []
+    
+    rejected = []
     try:
-        # Récupération des données
-        raw_data = fetch_velib_data()
+        # Verrou d'écriture pris d'emblée : pas d'échec au milieu du lot
+        conn.execute('BEGIN IMMEDIATE')
+        applied = {
+            snapshot_id for (snapshot_id,) in conn.execute(
+                'SELECT snapshot_id FROM spool_snapshots WHERE ts >= ?',
+                (min(snapshot['ts'] for snapshot in snapshots),)
+            )
+        }
+        pending = [snapshot for snapshot in snapshots if snapshot['id'] not in applied]
         
-        if not raw_data:
-            print("❌ Aucune donnée récupérée de l'API")
-            return
+        for snapshot in pending:
+            conn.execute('SAVEPOINT snapshot')
+            try:
+                apply_snapshot(conn, snapshot, name)
+            except Exception as e:
+                if _is_lock_error(e):
+                    raise
+                conn.execute('ROLLBACK TO snapshot')
+                rejected.append(snapshot)
+                print(f"⚠️ [{name}] Snapshot {snapshot['id']} rejeté: {e}")
+            conn.execute('RELEASE snapshot')
         
-        print(f"📊 {len(raw_data)} stations récupérées de l'API")
+        # Purge de l'historique une seule fois pour tout le lot
+        clear_old_data(conn)
         
-        # Transformation des données
-        transformed_data = transform_velib_data(raw_data)
+        # Marqueurs des snapshots traités, appliqués comme rejetés
+        conn.executemany(
+            'INSERT OR IGNORE INTO spool_snapshots (snapshot_id, ts, applied_at) VALUES (?, ?, ?)',
+            [(snapshot['id'], snapshot['ts'], int(time.time())) for snapshot in pending]
+        )
         
-        # Connexion à la base
-        conn = get_db_connection(DB_PATH)
+        # Rejets écrits avant le commit (reject_snapshot ignore un identifiant
+        # déjà présent) : un arrêt juste après le commit ne peut pas les perdre
+        for snapshot in rejected:
+            reject_snapshot(feed['spool_path'], snapshot)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        if not _is_lock_error(e):
+            raise
+        print(f"🔒 [{name}] Écriture impossible ({e}), {len(snapshots)} snapshots conservés dans le spool")
+        return None
+    
+    # Spool vidé après le commit
+    clear_spool(feed['spool_path'])
+    
+    # Marqueurs devenus inutiles
+    try:
+        conn.execute(
+            'DELETE FROM spool_snapshots WHERE ts <= ?',
+            (max(snapshot['ts'] for snapshot in snapshots),)
+        )
+        conn.commit()
+    except sqlite3.OperationalError:
+        # Simple ménage : les marqueurs restants seront supprimés au prochain déversement
+        conn.rollback()
+    
+    rejected_ids = {snapshot['id'] for snapshot in rejected}
+    applied_ids = [snapshot['id'] for snapshot in pending if snapshot['id'] not in rejected_ids]
+    if len(applied_ids) > 1:
+        print(f"📥 [{name}] {len(applied_ids)} snapshots rattrapés en une transaction")
+    
+    return applied_ids
+
+def fetch_and_store_data(feed=None):
+    """Tâche principale de récupération et stockage des données d'un flux
+    
+    Le snapshot récupéré est d'abord ajouté au spool du flux, puis le spool
+    est déversé dans la base : une erreur d'écriture (base verrouillée,
+    arrêt du conteneur) retarde les données sans les perdre.
+    """
+    feed = feed or load_feeds()[0]
+    name = feed['name']
+    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - 🔄 [{name}] Mise à jour des données...")
+    
+    try:
+        # Connexion à la base du flux (elle conserve aussi les validateurs HTTP)
+        conn = get_db_connection(feed['db_path'])
         
-        # Mise à jour des données (REMPLACEMENT, pas d'addition)
-        update_stations_data(conn, transformed_data)  # Stations fixes (remplace si existe)
-        update_availability_data(conn, transformed_data)  # Disponibilités (vide puis ajoute)
+        try:
+            # Récupération et transformation des données
+            fetched = None
+            current_id = None
+            try:
+                fetched = fetch_feed(conn, feed)
+                availability_data = fetched['availability']
+                if availability_data:
+                    print(f"📊 [{name}] {len(availability_data)} stations récupérées de l'API")
+                
+                if fetched['stations'] or availability_data or any(fetched['cache']):
+                    current_id = append_snapshot(feed['spool_path'], {'ts': int(time.time()), **fetched})
+            except Exception as e:
+                # Le spool en attente est déversé même si ce cycle a échoué
+                print(f"❌ [{name}] Erreur lors de la récupération: {e}")
+            
+            drained = drain_spool(conn, feed)
+        finally:
+            conn.close()
         
-        conn.close()
+        if fetched is None:
+            return
+        
+        if not availability_data:
+            if feed['type'] == 'gbfs':
+                print(f"⏭️ [{name}] station_status inchangé, aucune écriture")
+            else:
+                print(f"❌ [{name}] Aucune donnée récupérée de l'API")
+            return
+        
+        if drained is None or current_id is None:
+            return
+        
+        if current_id not in drained:
+            print(f"⚠️ [{name}] Snapshot {current_id} rejeté (voir {feed['spool_path']}.rejected), aucune donnée mise à jour")
+            return
         
-        print(f"✅ Données mises à jour: {len(transformed_data)} stations")
-        print(f"   - Vélos électriques: {sum(s['ebikes'] for s in transformed_data)}")
-        print(f"   - Vélos mécaniques: {sum(s['mechanical_bikes'] for s in transformed_data)}")
-        print(f"   - Places disponibles: {sum(s['docks_available'] for s in transformed_data)}")
+        print(f"✅ [{name}] Données mises à jour: {len(availability_data)} stations")
+        print(f"   - Vélos électriques: {sum(s['ebikes'] for s in availability_data)}")
+        print(f"   - Vélos mécaniques: {sum(s['mechanical_bikes'] for s in availability_data)}")
+        print(f"   - Places disponibles: {sum(s['docks_available'] for s in availability_data)}")
         
     except Exception as e:
-        print(f"❌ Erreur lors de la mise à jour: {e}")
+        print(f"❌ [{name}] Erreur lors de la mise à jour: {e}")
+
+class FeedPool:
+    """Exécute les cycles d'ingestion des flux dans un pool de processus
+    
+    Chaque flux a au plus un cycle en cours : si le précédent n'est pas
+    terminé au tick suivant, le tick est ignoré au lieu de s'empiler.
+    Un worker qui plante ne bloque pas les autres flux, le pool est recréé.
+    """
+    
+    def __init__(self, feeds):
+        self.max_workers = MAX_WORKERS or len(feeds)
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self.running = {}
+    
+    def submit(self, feed):
+        name = feed['name']
+        future = self.running.get(name)
+        if future is not None and not future.done():
+            print(f"⏳ [{name}] Cycle précédent encore en cours, tick ignoré")
+            return
+        
+        try:
+            self.running[name] = self.executor.submit(fetch_and_store_data, feed)
+        except BrokenProcessPool:
+            print("⚠️ Pool de workers interrompu, redémarrage")
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self.running = {}
+            self.running[name] = self.executor.submit(fetch_and_store_data, feed)
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
 
 def main():
     """Fonction principale"""
     print("🚀 Démarrage du service d'ingestion Vélib...")
-    print(f"📁 Base de données: {DB_PATH}")
     
-    # Initialisation de la base
-    init_database()
+    feeds = load_feeds()
+    
+    # Initialisation des bases (une par flux)
+    for feed in feeds:
+        print(f"📁 [{feed['name']}] Base de données: {feed['db_path']}")
+        init_database(feed['db_path'])
+        
+        # Snapshots restés dans le spool (arrêt, base verrouillée) : rattrapés au premier cycle
+        pending = repair_spool(feed['spool_path'])
+        if pending:
+            print(f"📦 [{feed['name']}] {pending} snapshots en attente dans le spool")
+    
+    pool = FeedPool(feeds)
+    
+    # Premier fetch immédiat, avant même de charger le planificateur
+    for feed in feeds:
+        pool.submit(feed)
     
-    # Premier fetch immédiat
-    fetch_and_store_data()
+    import schedule
     
-    # Planification des mises à jour régulières
-    schedule.every(5).minutes.do(fetch_and_store_data)
+    # Planification propre à chaque flux
+    for feed in feeds:
+        schedule.every(feed['interval']).seconds.do(pool.submit, feed)
+        print(f"⏰ [{feed['name']}] Service planifié - mise à jour toutes les {feed['interval']} secondes")
     
-    print(f"⏰ Service planifié - mise à jour toutes les 5 minutes")
     print("🔍 Logs de mise à jour ci-dessous...")
     print("-" * 50)
     
     # Boucle principale
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    try:
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    finally:
+        pool.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
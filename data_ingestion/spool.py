@@ -0,0 +1,114 @@
+"""
+Spool local (write-ahead) des snapshots récupérés
+
+Chaque snapshot est d'abord ajouté à un fichier propre au flux, puis
+déversé en bloc dans SQLite (voir fetch_velib.drain_spool). Une base
+verrouillée, un redémarrage du conteneur ou une rafale de cycles coûtent
+alors du retard, pas des données.
+
+Format : une suite d'enregistrements, chacun composé d'un en-tête
+(longueur, crc32) sur 8 octets suivi du snapshot en JSON compressé (zlib).
+Un enregistrement tronqué par un arrêt brutal est détecté par sa longueur
+ou son crc et retiré par repair_spool().
+
+Un seul cycle par flux écrit à la fois (FeedPool) : pas de verrou de fichier.
+"""
+import json
+import os
+import struct
+import zlib
+
+_HEADER = struct.Struct('>II')  # longueur du bloc compressé, crc32 du bloc
+
+
+def snapshot_id(snapshot):
+    """Identifiant stable d'un snapshot : horodatage + crc32 de son contenu
+
+    Sert de clé d'idempotence : un snapshot rejoué deux fois n'est appliqué
+    qu'une seule fois (table spool_snapshots).
+    """
+    body = json.dumps(snapshot, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return f"{snapshot['ts']}-{zlib.crc32(body):08x}"
+
+
+def _append_record(path, snapshot):
+    """Ajoute un enregistrement (en-tête + JSON compressé) et le synchronise sur disque"""
+    block = zlib.compress(json.dumps(snapshot, separators=(',', ':')).encode('utf-8'))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as f:
+        start = f.tell()
+        try:
+            f.write(_HEADER.pack(len(block), zlib.crc32(block)))
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        except OSError:
+            # Disque plein, etc. : on ne laisse pas d'enregistrement partiel
+            f.truncate(start)
+            raise
+
+
+def append_snapshot(path, snapshot):
+    """Ajoute un snapshot au spool et retourne son identifiant"""
+    snapshot = {**snapshot, 'id': snapshot_id(snapshot)}
+    _append_record(path, snapshot)
+    return snapshot['id']
+
+
+def reject_snapshot(path, snapshot):
+    """Écarte un snapshot inapplicable dans `<spool>.rejected` (même format, lisible par read_spool)
+
+    Un snapshot déjà présent (même identifiant) n'est pas ajouté une seconde fois.
+    """
+    rejected_path = f"{path}.rejected"
+    if any(rejected['id'] == snapshot['id'] for rejected in read_spool(rejected_path)[0]):
+        return
+    _append_record(rejected_path, snapshot)
+
+
+def read_spool(path):
+    """Lit les snapshots du spool
+
+    Retourne (snapshots, fin_valide) : la lecture s'arrête au premier
+    enregistrement tronqué ou corrompu, `fin_valide` est sa position.
+    """
+    if not os.path.exists(path):
+        return [], 0
+
+    snapshots = []
+    valid_end = 0
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                break
+            length, crc = _HEADER.unpack(header)
+            block = f.read(length)
+            if len(block) < length or zlib.crc32(block) != crc:
+                break
+            snapshots.append(json.loads(zlib.decompress(block)))
+            valid_end = f.tell()
+
+    return snapshots, valid_end
+
+
+def repair_spool(path):
+    """Retire un éventuel enregistrement tronqué en fin de spool
+
+    À appeler au démarrage, avant tout nouvel ajout : un ajout placé après
+    un enregistrement tronqué ne serait jamais relu. Retourne le nombre de
+    snapshots en attente.
+    """
+    snapshots, valid_end = read_spool(path)
+    if os.path.exists(path) and os.path.getsize(path) > valid_end:
+        print(f"🩹 Spool {path}: enregistrement incomplet retiré "
+              f"({os.path.getsize(path) - valid_end} octets)")
+        os.truncate(path, valid_end)
+    return len(snapshots)
+
+
+def clear_spool(path):
+    """Vide le spool une fois tous ses snapshots appliqués"""
+    if os.path.exists(path):
+        os.truncate(path, 0)
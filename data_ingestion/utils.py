@@ -1,16 +1,22 @@
-import requests
 import sqlite3
 import os
 import json
+import time
 from datetime import datetime
 
 def get_db_connection(db_path):
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     return sqlite3.connect(db_path)
 
-def fetch_velib_data():
-    url = "https://opendata.paris.fr/api/explore/v2.1/catalog/datasets/velib-disponibilite-en-temps-reel/records"
-    params = {'limit': 100}  # Récupérer 100 stations
+VELIB_API_URL = "https://opendata.paris.fr/api/explore/v2.1/catalog/datasets/velib-disponibilite-en-temps-reel/records"
+
+def fetch_velib_data(url=None):
+    url = url or VELIB_API_URL
+    # L'URL configurée (VELIB_API) peut déjà contenir ses paramètres
+    params = None if '?' in url else {'limit': 100}  # Récupérer 100 stations
+    
+    # Import différé : requests n'est chargé que par les workers qui interrogent l'API
+    import requests
     
     try:
         response = requests.get(url, params=params, timeout=10)
@@ -21,6 +27,19 @@ def fetch_velib_data():
         print(f"❌ Erreur API: {e}")
         return []
 
+def parse_epoch(value):
+    """Convertit une date ISO 8601 ou un epoch en secondes epoch (None si absente)"""
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
 def transform_velib_data(raw_data):
     """Transforme les données brutes de l'API pour la base de données"""
     transformed = []
@@ -44,61 +63,125 @@ def transform_velib_data(raw_data):
             'is_installed': is_installed,
             'is_renting': is_renting,
             'is_returning': is_returning,
-            'duedate': station.get('duedate', ''),
+            'duedate': parse_epoch(station.get('duedate')),
             'timestamp': datetime.now().isoformat()
         })
     
     return transformed
 
-def init_database():
-    """Initialise la structure de la base de données"""
-    db_path = os.getenv('DB_PATH', './db/data/velib.db')
-    conn = get_db_connection(db_path)
-    cursor = conn.cursor()
+def fetch_json_if_changed(conn, url, min_interval=0):
+    """GET conditionnel d'un flux JSON (GBFS)
+    
+    Retourne (payload, cache) : payload vaut None si le flux est encore
+    frais (ttl / min_interval non écoulé), si le serveur répond 304 ou si
+    `last_updated` n'a pas bougé. `cache` est à enregistrer avec
+    save_fetch_cache() une fois les données écrites (None si rien à faire).
+    """
+    try:
+        row = conn.execute(
+            'SELECT etag, last_modified, last_updated, ttl, fetched_at FROM feed_cache WHERE url = ?',
+            (url,)
+        ).fetchone()
+    except sqlite3.OperationalError as e:
+        # Base verrouillée : GET inconditionnel, le snapshot ira dans le spool
+        print(f"⚠️ Validateurs de {url} illisibles ({e}), requête complète")
+        row = None
+    now = int(time.time())
+    headers = {}
     
-    # Table des stations (informations fixes)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS stations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            station_id TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            capacity INTEGER,
-            nom_arrondissement_communes TEXT,
-            coordonnees_geo TEXT,
-            code_insee_commune TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    if row:
+        etag, last_modified, last_updated, ttl, fetched_at = row
+        if now < fetched_at + max(ttl or 0, min_interval):
+            return None, None
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
     
-    # Table des disponibilités (données temps-réel)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS availability (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            station_id TEXT NOT NULL,
-            ebikes INTEGER,
-            mechanical_bikes INTEGER,
-            docks_available INTEGER,
-            bikes_available INTEGER,
-            is_installed BOOLEAN,
-            is_renting BOOLEAN,
-            is_returning BOOLEAN,
-            duedate TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (station_id) REFERENCES stations (station_id)
-        )
-    ''')
+    import requests
     
-    # Index pour améliorer les performances
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_availability_station_time 
-        ON availability(station_id, timestamp)
-    ''')
+    response = requests.get(url, headers=headers, timeout=10)
     
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_stations_id 
-        ON stations(station_id)
-    ''')
+    if response.status_code == 304:
+        return None, (url, etag, last_modified, last_updated, ttl, now)
     
-    conn.commit()
-    conn.close()
-    print("✅ Base de données initialisée avec la nouvelle structure")
\ No newline at end of file
+    response.raise_for_status()
+    payload = response.json()
+    
+    cache = (
+        url,
+        response.headers.get('ETag'),
+        response.headers.get('Last-Modified'),
+        str(payload.get('last_updated', '')),
+        int(payload.get('ttl', 0) or 0),
+        now
+    )
+    
+    if row and cache[3] and cache[3] == row[2]:
+        return None, cache
+    
+    return payload, cache
+
+def save_fetch_cache(conn, entries):
+    """Enregistre les validateurs HTTP des flux récupérés (sans commit)"""
+    conn.cursor().executemany('''
+        INSERT OR REPLACE INTO feed_cache
+        (url, etag, last_modified, last_updated, ttl, fetched_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [entry for entry in entries if entry])
+
+def _gbfs_flag(value):
+    """Normalise un booléen GBFS (true/false ou 1/0) en 1/0"""
+    return 1 if value in (True, 1, '1', 'true') else 0
+
+def _gbfs_name(value):
+    """GBFS v3 fournit des noms localisés [{'text': ..., 'language': ...}]"""
+    if isinstance(value, list):
+        return value[0].get('text', '') if value else ''
+    return value or ''
+
+def _gbfs_bike_types(status):
+    """Extrait (électriques, mécaniques) des compteurs par type GBFS"""
+    ebikes, mechanical = 0, 0
+    for bike_type in status.get('num_bikes_available_types', []):
+        ebikes += bike_type.get('ebike', 0)
+        mechanical += bike_type.get('mechanical', 0)
+    return ebikes, mechanical
+
+def transform_gbfs_information(information):
+    """Transforme station_information (données fixes) au format de la table stations"""
+    return [
+        {
+            'station_id': str(station.get('station_id', '')),
+            'name': _gbfs_name(station.get('name')),
+            'capacity': station.get('capacity', 0),
+            'coordonnees_geo': json.dumps({'lat': station.get('lat'), 'lon': station.get('lon')}),
+            'nom_arrondissement_communes': ''
+        }
+        for station in information
+    ]
+
+def transform_gbfs_status(status):
+    """Transforme station_status (données temps-réel) au format de la table availability"""
+    transformed = []
+    
+    for station in status:
+        bikes_available = station.get('num_bikes_available', station.get('num_vehicles_available', 0))
+        ebikes, mechanical = _gbfs_bike_types(station)
+        if not station.get('num_bikes_available_types'):
+            mechanical = bikes_available
+        
+        transformed.append({
+            'station_id': str(station.get('station_id', '')),
+            'ebikes': ebikes,
+            'mechanical_bikes': mechanical,
+            'docks_available': station.get('num_docks_available', 0),
+            'bikes_available': bikes_available,
+            'is_installed': _gbfs_flag(station.get('is_installed', True)),
+            'is_renting': _gbfs_flag(station.get('is_renting', True)),
+            'is_returning': _gbfs_flag(station.get('is_returning', True)),
+            'duedate': parse_epoch(station.get('last_reported')),
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    return transformed
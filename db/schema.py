@@ -0,0 +1,428 @@
+"""
+Schéma versionné de la base Vélib
+
+Unique définition du schéma, partagée par l'ingestion et les scripts.
+Chaque migration est numérotée (sa position dans MIGRATIONS) et la
+dernière version appliquée est enregistrée dans PRAGMA user_version.
+Les migrations sont idempotentes (IF NOT EXISTS, vérification du schéma
+existant) : une migration interrompue avant la mise à jour de user_version
+peut être rejouée sans risque.
+
+Les recopies de données volumineuses passent par chunked_backfill() :
+des lots courts, chacun dans sa propre transaction, avec la progression
+enregistrée dans migration_progress. Le verrou d'écriture n'est tenu que
+le temps d'un lot et une migration interrompue reprend au dernier lot
+validé. Pour ajouter une colonne : ALTER TABLE ... ADD COLUMN (instantané)
+puis remplissage par chunked_backfill. Pour un nouvel index ou un nouveau
+partitionnement d'une grosse table : recopie par lots dans une nouvelle
+table puis bascule courte (voir _m002_compact_availability).
+
+Usage :
+    python -m db.schema
+"""
+import os
+import sqlite3
+import time
+
+# Bits de la colonne flags de availability
+FLAG_INSTALLED = 1
+FLAG_RENTING = 2
+FLAG_RETURNING = 4
+
+# Taille des lots et pause entre lots pour les recopies en ligne
+CHUNK_SIZE = int(os.getenv('MIGRATION_CHUNK_SIZE', '5000'))
+CHUNK_PAUSE = float(os.getenv('MIGRATION_CHUNK_PAUSE', '0'))
+
+AVAILABILITY_DDL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        station_key INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        ebikes INTEGER,
+        mechanical_bikes INTEGER,
+        docks_available INTEGER,
+        bikes_available INTEGER,
+        flags INTEGER NOT NULL DEFAULT 0,
+        duedate INTEGER,
+        PRIMARY KEY (station_key, ts)
+    ) WITHOUT ROWID
+'''
+
+
+def pack_flags(is_installed, is_renting, is_returning):
+    """Regroupe les trois booléens de statut dans un entier"""
+    return (
+        (FLAG_INSTALLED if is_installed else 0)
+        | (FLAG_RENTING if is_renting else 0)
+        | (FLAG_RETURNING if is_returning else 0)
+    )
+
+
+# ===== Recopies par lots reprenables =====
+
+def _load_progress(conn, name):
+    """Dernière clé traitée par le backfill `name` (0 si non commencé)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS migration_progress (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    ''')
+    row = conn.execute(
+        'SELECT last_id FROM migration_progress WHERE name = ?', (name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def chunked_backfill(conn, name, table, apply_chunk, key='rowid',
+                     chunk_size=None, pause=None):
+    """Applique `apply_chunk(cursor, after_id, upto_id)` par lots de `table`
+
+    Les lots suivent l'ordre croissant de la clé entière `key` ; chacun est
+    validé dans sa propre transaction avec la progression, ce qui permet de
+    reprendre après une interruption. Retourne (dernière clé traitée,
+    nombre de lignes modifiées). Le backfill reste enregistré tant que
+    finish_backfill() n'a pas été appelé.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    pause = CHUNK_PAUSE if pause is None else pause
+
+    cursor = conn.cursor()
+    last_id = _load_progress(conn, name)
+    conn.commit()
+    changed = 0
+
+    while True:
+        upto_id = cursor.execute(f'''
+            SELECT MAX({key}) FROM (
+                SELECT {key} FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?
+            )
+        ''', (last_id, chunk_size)).fetchone()[0]
+        if upto_id is None:
+            break
+
+        apply_chunk(cursor, last_id, upto_id)
+        changed += max(cursor.rowcount, 0)
+        cursor.execute(
+            'INSERT OR REPLACE INTO migration_progress (name, last_id) VALUES (?, ?)',
+            (name, upto_id)
+        )
+        conn.commit()
+
+        last_id = upto_id
+        if pause:
+            time.sleep(pause)
+
+    return last_id, changed
+
+
+def finish_backfill(cursor, name):
+    """Oublie la progression d'un backfill terminé (sans commit)"""
+    cursor.execute('DELETE FROM migration_progress WHERE name = ?', (name,))
+
+
+# ===== Migrations =====
+
+def _m001_stations(conn):
+    """Table des stations (informations fixes)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            station_id TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            capacity INTEGER,
+            nom_arrondissement_communes TEXT,
+            coordonnees_geo TEXT,
+            code_insee_commune TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_stations_id
+        ON stations(station_id)
+    ''')
+
+
+def _is_legacy_availability(conn):
+    """Vrai si availability utilise encore l'ancien schéma (station_id TEXT, timestamp TEXT)"""
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(availability)')]
+    return 'station_id' in columns
+
+
+# Conversion d'une ligne de l'ancien schéma (alias a) vers le schéma compact
+_LEGACY_AVAILABILITY_SELECT = '''
+    SELECT
+        s.id,
+        CAST(strftime('%s', a.timestamp, 'utc') AS INTEGER),
+        a.ebikes,
+        a.mechanical_bikes,
+        a.docks_available,
+        a.bikes_available,
+        (CASE WHEN a.is_installed THEN 1 ELSE 0 END)
+        | (CASE WHEN a.is_renting THEN 2 ELSE 0 END)
+        | (CASE WHEN a.is_returning THEN 4 ELSE 0 END),
+        CASE
+            WHEN a.duedate GLOB '[0-9]*' AND a.duedate NOT GLOB '*[^0-9]*' THEN CAST(a.duedate AS INTEGER)
+            ELSE CAST(strftime('%s', a.duedate) AS INTEGER)
+        END
+    FROM availability a
+    JOIN stations s ON s.station_id = a.station_id
+    WHERE a.id > ? AND a.id <= ? AND a.timestamp IS NOT NULL
+'''
+
+
+def _copy_legacy_availability(cursor, after_id, upto_id):
+    """Copie les lignes d'ids ]after_id, upto_id] vers availability_compact"""
+    # Stations référencées mais absentes de la table stations (clé étrangère non vérifiée)
+    cursor.execute('''
+        INSERT OR IGNORE INTO stations (station_id, name)
+        SELECT DISTINCT station_id, '' FROM availability
+        WHERE id > ? AND id <= ?
+    ''', (after_id, upto_id))
+
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO availability_compact
+        (station_key, ts, ebikes, mechanical_bikes, docks_available, bikes_available, flags, duedate)
+        {_LEGACY_AVAILABILITY_SELECT}
+    ''', (after_id, upto_id))
+
+
+def migrate_to_compact(conn, chunk_size=None, pause=None):
+    """Migre availability de l'ancien schéma vers le schéma compact, en ligne
+
+    Recopie par lots dans availability_compact, puis bascule (lignes
+    arrivées pendant la recopie, remplacement de la table) dans une seule
+    transaction courte. Retourne le nombre de lignes migrées.
+    """
+    if not _is_legacy_availability(conn):
+        return 0
+
+    conn.execute(AVAILABILITY_DDL.format(table='availability_compact'))
+    conn.commit()
+
+    last_id, migrated = chunked_backfill(
+        conn, 'availability_compact', 'availability', _copy_legacy_availability,
+        key='id', chunk_size=chunk_size, pause=pause
+    )
+
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        _copy_legacy_availability(cursor, last_id, 2 ** 63 - 1)
+        migrated += cursor.rowcount
+        cursor.execute('DROP VIEW IF EXISTS latest_availability')
+        cursor.execute('DROP TABLE availability')
+        cursor.execute('ALTER TABLE availability_compact RENAME TO availability')
+        finish_backfill(cursor, 'availability_compact')
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    print(f"✅ Table availability migrée vers le schéma compact: {migrated} lignes")
+    return migrated
+
+
+def _m002_compact_availability(conn):
+    """Table availability compacte (station_key, ts epoch, flags), WITHOUT ROWID
+
+    Pas d'index secondaire sur ts : les requêtes par station utilisent la clé
+    primaire groupée, et pour les fenêtres temporelles toutes stations
+    confondues un parcours de la table reste plus rapide qu'un accès indexé
+    (voir benchmarks/bench_schema.py).
+    """
+    if _is_legacy_availability(conn):
+        migrate_to_compact(conn)
+    else:
+        conn.execute(AVAILABILITY_DDL.format(table='availability'))
+
+
+def _m003_station_events(conn):
+    """Tables d'état et d'épisodes des stations (vide / pleine / hors service)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS station_state (
+            station_id TEXT PRIMARY KEY,
+            state INTEGER NOT NULL,
+            since TIMESTAMP NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS station_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            station_id TEXT NOT NULL,
+            state INTEGER NOT NULL,
+            started_at TIMESTAMP NOT NULL,
+            ended_at TIMESTAMP NOT NULL,
+            duration_s INTEGER NOT NULL,
+            FOREIGN KEY (station_id) REFERENCES stations (station_id)
+        )
+    ''')
+    # Index pour les alertes "vide depuis plus de N minutes"
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_station_state_state_since
+        ON station_state(state, since)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_station_events_station_time
+        ON station_events(station_id, started_at)
+    ''')
+
+
+def _m004_feed_cache(conn):
+    """Validateurs HTTP des flux (ETag / Last-Modified / ttl GBFS)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS feed_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            last_updated TEXT,
+            ttl INTEGER,
+            fetched_at INTEGER
+        )
+    ''')
+
+
+def _m005_latest_availability_view(conn):
+    """Vue des données les plus récentes par station"""
+    conn.execute('''
+        CREATE VIEW IF NOT EXISTS latest_availability AS
+        SELECT
+            s.station_id,
+            s.name,
+            s.capacity,
+            s.nom_arrondissement_communes as arrondissement,
+            s.coordonnees_geo,
+            a.ebikes,
+            a.mechanical_bikes,
+            a.docks_available,
+            a.bikes_available,
+            (a.flags & 1) != 0 as is_installed,
+            (a.flags & 2) != 0 as is_renting,
+            (a.flags & 4) != 0 as is_returning,
+            datetime(a.ts, 'unixepoch', 'localtime') as timestamp
+        FROM stations s
+        JOIN availability a ON a.station_key = s.id
+        WHERE a.ts = (
+            SELECT MAX(ts)
+            FROM availability
+            WHERE station_key = s.id
+        )
+    ''')
+
+
+def _m006_spool_snapshots(conn):
+    """Snapshots du spool déjà appliqués (rejeu idempotent)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS spool_snapshots (
+            snapshot_id TEXT PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            applied_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def _m007_epoch_station_events(conn):
+    """station_state / station_events en epoch entier, par station_key
+
+    Les horodatages texte en heure locale faussaient les durées et l'ordre
+    de l'index (state, since) au passage à l'heure d'hiver. Les lignes
+    existantes sont converties (heure locale -> epoch UTC) ; la bascule se
+    fait dans une seule transaction.
+    """
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(station_state)')]
+    if 'station_key' in columns:
+        return
+
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute('''
+        CREATE TABLE station_state_new (
+            station_key INTEGER PRIMARY KEY,
+            state INTEGER NOT NULL,
+            since INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE station_events_new (
+            id INTEGER PRIMARY KEY,
+            station_key INTEGER NOT NULL,
+            state INTEGER NOT NULL,
+            started_at INTEGER NOT NULL,
+            ended_at INTEGER NOT NULL,
+            duration_s INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO station_state_new (station_key, state, since)
+        SELECT s.id, st.state, CAST(strftime('%s', st.since, 'utc') AS INTEGER)
+        FROM station_state st
+        JOIN stations s ON s.station_id = st.station_id
+    ''')
+    conn.execute('''
+        INSERT INTO station_events_new (id, station_key, state, started_at, ended_at, duration_s)
+        SELECT e.id, s.id, e.state,
+               CAST(strftime('%s', e.started_at, 'utc') AS INTEGER),
+               CAST(strftime('%s', e.ended_at, 'utc') AS INTEGER),
+               e.duration_s
+        FROM station_events e
+        JOIN stations s ON s.station_id = e.station_id
+    ''')
+    conn.execute('DROP TABLE station_state')
+    conn.execute('DROP TABLE station_events')
+    conn.execute('ALTER TABLE station_state_new RENAME TO station_state')
+    conn.execute('ALTER TABLE station_events_new RENAME TO station_events')
+    # Index pour les alertes "vide depuis plus de N minutes"
+    conn.execute('CREATE INDEX idx_station_state_state_since ON station_state(state, since)')
+    conn.execute('CREATE INDEX idx_station_events_station_time ON station_events(station_key, started_at)')
+    conn.commit()
+
+
+# Ordre = numéro de version. Ne jamais réordonner ni retirer : ajouter à la fin.
+MIGRATIONS = [
+    _m001_stations,
+    _m002_compact_availability,
+    _m003_station_events,
+    _m004_feed_cache,
+    _m005_latest_availability_view,
+    _m006_spool_snapshots,
+    _m007_epoch_station_events,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    """Version du schéma enregistrée dans la base"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Applique les migrations manquantes et retourne la version atteinte"""
+    version = schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Base au schéma v{version}, plus récent que ce code (v{SCHEMA_VERSION})"
+        )
+
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        migration(conn)
+        conn.execute(f'PRAGMA user_version = {number}')
+        conn.commit()
+        print(f"🧱 Migration {number:03d} appliquée: {migration.__doc__.splitlines()[0]}")
+
+    return schema_version(conn)
+
+
+def init_database(db_path=None):
+    """Initialise ou met à jour la structure de la base de données"""
+    db_path = db_path or os.getenv('DB_PATH', './db/data/velib.db')
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        version = migrate(conn)
+    finally:
+        conn.close()
+    print(f"✅ Base de données initialisée: {db_path} (schéma v{version})")
+
+
+if __name__ == "__main__":
+    init_database()
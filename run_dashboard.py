@@ -11,10 +11,9 @@ def main():
     print("📊 Le dashboard sera accessible sur http://localhost:8501")
     print("⏹️  Appuyez sur Ctrl+C pour arrêter")
     
-    # Lancer Streamlit
+    # Lancer Streamlit (avec préchargement des modules et caches)
     subprocess.run([
-        sys.executable, "-m", "streamlit", "run", 
-        "dashboard/app.py",
+        sys.executable, "dashboard/serve.py",
         "--server.port", "8501",
         "--server.address", "0.0.0.0"
     ])
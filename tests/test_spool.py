@@ -0,0 +1,181 @@
+"""
+Tests du spool d'ingestion (data_ingestion/spool.py) et de son déversement
+
+Usage :
+    python -m pytest tests
+"""
+import os
+import sqlite3
+import time
+
+import pytest
+
+from data_ingestion import fetch_velib
+from data_ingestion.spool import append_snapshot, read_spool, repair_spool
+from db.schema import init_database
+
+
+def make_station(station_id, name='Station', bikes=3):
+    """Station au format commun (données fixes + disponibilités)"""
+    return {
+        'station_id': station_id,
+        'name': name,
+        'capacity': 10,
+        'nom_arrondissement_communes': 'Paris',
+        'coordonnees_geo': None,
+        'ebikes': bikes,
+        'mechanical_bikes': 0,
+        'docks_available': 10 - bikes,
+        'bikes_available': bikes,
+        'is_installed': 1,
+        'is_renting': 1,
+        'is_returning': 1,
+        'duedate': 0,
+    }
+
+
+def make_snapshot(ts, stations):
+    return {'ts': ts, 'stations': stations, 'availability': stations, 'cache': []}
+
+
+@pytest.fixture
+def feed(tmp_path):
+    db_path = str(tmp_path / 'velib.db')
+    init_database(db_path)
+    return {
+        'name': 'test',
+        'type': 'opendata',
+        'db_path': db_path,
+        'spool_path': str(tmp_path / 'spool' / 'test.spool'),
+    }
+
+
+@pytest.fixture
+def conn(feed):
+    conn = sqlite3.connect(feed['db_path'], timeout=0.1)
+    yield conn
+    conn.close()
+
+
+def count(conn, table):
+    return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+def drain_with_crash(conn, feed, monkeypatch):
+    """Déverse le spool puis simule un arrêt entre le commit et sa remise à zéro"""
+    def crash(path):
+        raise SystemExit('arrêt simulé')
+
+    monkeypatch.setattr(fetch_velib, 'clear_spool', crash)
+    with pytest.raises(SystemExit):
+        fetch_velib.drain_spool(conn, feed)
+    monkeypatch.undo()
+
+
+def test_spool_roundtrip(feed):
+    now = int(time.time())
+    first = append_snapshot(feed['spool_path'], make_snapshot(now, [make_station('1')]))
+    second = append_snapshot(feed['spool_path'], make_snapshot(now + 60, [make_station('2')]))
+
+    snapshots, valid_end = read_spool(feed['spool_path'])
+
+    assert [snapshot['id'] for snapshot in snapshots] == [first, second]
+    assert snapshots[1]['availability'][0]['station_id'] == '2'
+    assert valid_end == os.path.getsize(feed['spool_path'])
+
+
+def test_repair_removes_torn_record(feed):
+    now = int(time.time())
+    append_snapshot(feed['spool_path'], make_snapshot(now, [make_station('1')]))
+    size = os.path.getsize(feed['spool_path'])
+    with open(feed['spool_path'], 'ab') as f:
+        f.write(b'\x00\x00\x10\x00partiel')
+
+    assert repair_spool(feed['spool_path']) == 1
+    assert os.path.getsize(feed['spool_path']) == size
+
+    # Un ajout après réparation reste lisible
+    append_snapshot(feed['spool_path'], make_snapshot(now + 60, [make_station('1')]))
+    assert len(read_spool(feed['spool_path'])[0]) == 2
+
+
+def test_drain_keeps_every_snapshot(feed, conn):
+    now = int(time.time())
+    for offset, bikes in ((0, 3), (300, 0), (600, 3)):
+        append_snapshot(feed['spool_path'], make_snapshot(now + offset, [make_station('1', bikes=bikes)]))
+
+    applied = fetch_velib.drain_spool(conn, feed)
+
+    assert len(applied) == 3
+    assert count(conn, 'availability') == 3
+    assert count(conn, 'station_events') == 1
+    assert read_spool(feed['spool_path'])[0] == []
+
+
+def test_replay_after_crash_is_idempotent(feed, conn, monkeypatch):
+    now = int(time.time())
+    for offset, bikes in ((0, 3), (300, 0), (600, 3)):
+        append_snapshot(feed['spool_path'], make_snapshot(now + offset, [make_station('1', bikes=bikes)]))
+
+    drain_with_crash(conn, feed, monkeypatch)
+    assert len(read_spool(feed['spool_path'])[0]) == 3
+
+    assert fetch_velib.drain_spool(conn, feed) == []
+    assert count(conn, 'availability') == 3
+    assert count(conn, 'station_events') == 1
+    assert read_spool(feed['spool_path'])[0] == []
+
+
+def test_drain_keeps_spool_when_database_is_locked(feed, conn):
+    append_snapshot(feed['spool_path'], make_snapshot(int(time.time()), [make_station('1')]))
+
+    locker = sqlite3.connect(feed['db_path'], isolation_level=None)
+    locker.execute('BEGIN EXCLUSIVE')
+    try:
+        assert fetch_velib.drain_spool(conn, feed) is None
+    finally:
+        locker.execute('ROLLBACK')
+        locker.close()
+
+    assert len(read_spool(feed['spool_path'])[0]) == 1
+    assert len(fetch_velib.drain_spool(conn, feed)) == 1
+    assert count(conn, 'availability') == 1
+
+
+def test_drain_rejects_invalid_snapshot_without_blocking(feed, conn, monkeypatch):
+    now = int(time.time())
+    good = append_snapshot(feed['spool_path'], make_snapshot(now, [make_station('1')]))
+    bad = append_snapshot(feed['spool_path'], make_snapshot(now + 300, [make_station('2', name=None)]))
+    last = append_snapshot(feed['spool_path'], make_snapshot(now + 600, [make_station('1')]))
+    rejected_path = feed['spool_path'] + '.rejected'
+
+    # Rejeu après un arrêt : le snapshot rejeté n'est ni réappliqué ni écarté deux fois
+    drain_with_crash(conn, feed, monkeypatch)
+    assert count(conn, 'availability') == 2
+    markers = {snapshot_id for (snapshot_id,) in conn.execute('SELECT snapshot_id FROM spool_snapshots')}
+    assert markers == {good, bad, last}
+    assert [snapshot['id'] for snapshot in read_spool(rejected_path)[0]] == [bad]
+
+    assert fetch_velib.drain_spool(conn, feed) == []
+    assert [snapshot['id'] for snapshot in read_spool(rejected_path)[0]] == [bad]
+    assert read_spool(feed['spool_path'])[0] == []
+
+    # Sans arrêt, les snapshots valides du lot sont appliqués malgré le rejet
+    valid = append_snapshot(feed['spool_path'], make_snapshot(now + 900, [make_station('1')]))
+    append_snapshot(feed['spool_path'], make_snapshot(now + 1200, [make_station('3', name=None)]))
+    assert fetch_velib.drain_spool(conn, feed) == [valid]
+    assert len(read_spool(rejected_path)[0]) == 2
+
+
+def test_fetch_and_store_reports_rejected_snapshot(feed, monkeypatch, capsys):
+    stations = [make_station('1', name=None)]
+    monkeypatch.setattr(
+        fetch_velib, 'fetch_feed',
+        lambda conn, feed: {'stations': stations, 'availability': stations, 'cache': []}
+    )
+
+    fetch_velib.fetch_and_store_data(feed)
+
+    output = capsys.readouterr().out
+    assert 'rejeté' in output
+    assert 'Données mises à jour' not in output